@@ -1,9 +1,14 @@
 
+import os
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Resolved next to this file so the app can be launched from any working directory
+THEME_PATH = os.path.join(os.path.dirname(__file__), 'static', 'theme.css')
 
 # Page configuration
 st.set_page_config(
@@ -11,58 +16,13 @@ st.set_page_config(
     layout="wide"
 )
 
-# Apply professional nude/beige theme styling
-st.markdown("""
-<style>
-    .stApp {
-        background-color: #f7f5f3;
-        color: #2c2c2c;
-    }
-    .stSidebar {
-        background-color: #ede9e6;
-        border-right: 1px solid #d4cfc8;
-    }
-    .stSelectbox > div > div {
-        background-color: #ffffff;
-        border: 1px solid #d4cfc8;
-        color: #2c2c2c;
-    }
-    .stMultiSelect > div > div {
-        background-color: #ffffff;
-        border: 1px solid #d4cfc8;
-        color: #2c2c2c;
-    }
-    .stRadio > div {
-        background-color: #f7f5f3;
-    }
-    .stMetric {
-        background-color: #ffffff;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border: 1px solid #e8e3de;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-    }
-    h1 {
-        color: #3d3d3d;
-        font-weight: 600;
-        border-bottom: 2px solid #d4cfc8;
-        padding-bottom: 0.5rem;
-    }
-    h2 {
-        color: #4a4a4a;
-        font-weight: 500;
-    }
-    h3 {
-        color: #5a5a5a;
-        font-weight: 500;
-    }
-    .stExpander {
-        background-color: #ffffff;
-        border: 1px solid #e8e3de;
-        border-radius: 0.5rem;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Apply professional nude/beige theme styling (read once per process)
+@st.cache_resource
+def get_theme():
+    with open(THEME_PATH) as f:
+        return f"<style>\n{f.read()}</style>"
+
+st.markdown(get_theme(), unsafe_allow_html=True)
 
 st.title("Lebanon Transportation Infrastructure Analysis")
 st.markdown("""
@@ -70,47 +30,232 @@ This dashboard analyzes the relationship between road quality and transportation
 The interactive visualizations reveal how infrastructure quality impacts transportation choices and regional accessibility.
 """)
 
-# Load data function
-@st.cache_data
-def load_data():
+# Data sources and the columns used downstream
+DATA_PATH = 'public transportation.csv'
+PARQUET_PATH = 'public transportation.parquet'
+
+ROAD_COLS = [
+    'State of the main roads - good',
+    'State of the secondary roads - good',
+    'State of agricultural roads - good',
+]
+TRANSPORT_COL = {
+    'Buses': 'The main means of public transport - buses',
+    'Vans': 'The main means of public transport - vans',
+    'Taxis': 'The main means of public transport - taxis',
+}
+TRANSPORT_COLS = list(TRANSPORT_COL.values())
+DATA_COLS = ['refArea', 'Governorate', *ROAD_COLS, *TRANSPORT_COLS]
+
+# The charts need no mode bar; everything else keeps plotly.js's defaults
+PLOTLY_CONFIG = {'displayModeBar': False}
+
+# The parts of Streamlit's chart template these figures use: its themed colorway (placeholder
+# colors the frontend swaps for theme colors) and its scatter defaults, without the rest
+_STREAMLIT_TEMPLATE = pio.templates['streamlit']
+FIGURE_TEMPLATE = go.layout.Template(
+    layout=dict(colorway=_STREAMLIT_TEMPLATE.layout.colorway),
+    data=dict(scatter=_STREAMLIT_TEMPLATE.data.scatter)
+)
+
+# Display names, e.g. 'State of the main roads - good' -> 'Main Roads'
+ROAD_LABEL = {col: col.replace('State of the ', '').replace(' - good', '').title() for col in ROAD_COLS}
+
+# Load data function (persisted to disk so process restarts skip even the Parquet read).
+# csv_mtime only keys the cache, so a changed or newly added CSV is picked up.
+@st.cache_data(persist="disk")
+def load_data(csv_mtime):
     try:
-        df = pd.read_csv('public transportation.csv')
-        if 'refArea' in df.columns:
-            df['Governorate'] = df['refArea'].str.extract(r'/([^/]+)$')
+        # Reuse the Parquet copy unless the CSV has changed since it was written
+        if os.path.exists(PARQUET_PATH) and os.path.getmtime(PARQUET_PATH) >= os.path.getmtime(DATA_PATH):
+            return pd.read_parquet(PARQUET_PATH, columns=DATA_COLS)
+
+        # Parse only the used columns, reading the 0/1 indicators straight into int8
+        df = pd.read_csv(
+            DATA_PATH,
+            usecols=lambda col: col.strip() in DATA_COLS,
+            dtype={col: np.int8 for col in ROAD_COLS + TRANSPORT_COLS},
+            engine='c'
+        )
         df.columns = df.columns.str.strip()
+        if 'Governorate' not in df.columns:
+            # Region name is the last path segment of the refArea URI
+            df['Governorate'] = df['refArea'].str.rsplit('/', n=1).str.get(-1)
+        # Governorate is a small set of repeated labels
+        df = df[DATA_COLS].astype({'Governorate': 'category'})
+        try:
+            df.to_parquet(PARQUET_PATH, compression='zstd')
+        except OSError:
+            pass  # read-only deployments simply keep parsing the CSV
         return df
     
     except FileNotFoundError:
         st.warning("Using sample data for demonstration. Upload 'public transportation.csv' for real data.")
-        np.random.seed(42)
+        rng = np.random.default_rng(42)
         regions = ['Marjeyoun_District', 'Batroun_District', 'Zgharta_District', 'North_Governorate', 
                    'Matn_District', 'Tyre_District', 'Beqaa_Governorate', 'Sidon_District']
+        rows_per_region = 50
+        n = len(regions) * rows_per_region
+        region_col = np.repeat(regions, rows_per_region)
+
+        # Probability of a 1 for each indicator column
+        probabilities = {
+            'The main means of public transport - buses': 0.1,
+            'The main means of public transport - vans': 0.3,
+            'The main means of public transport - taxis': 0.7,
+            'State of the main roads - good': 0.2,
+            'State of the main roads - bad': 0.3,
+            'State of the secondary roads - good': 0.25,
+            'State of agricultural roads - good': 0.4,
+        }
+
+        data = {
+            'refArea': np.char.add('/lebanon/', np.char.lower(region_col)),
+            'Governorate': region_col,
+            **{col: rng.binomial(1, p, size=n).astype(np.int8)
+               for col, p in probabilities.items()}
+        }
         
-        data = []
-        for region in regions:
-            for i in range(50):
-                data.append({
-                    'refArea': f'/lebanon/{region.lower()}',
-                    'Governorate': region,
-                    'The main means of public transport - buses': np.random.choice([0, 1], p=[0.9, 0.1]),
-                    'The main means of public transport - vans': np.random.choice([0, 1], p=[0.7, 0.3]),
-                    'The main means of public transport - taxis': np.random.choice([0, 1], p=[0.3, 0.7]),
-                    'State of the main roads - good': np.random.choice([0, 1], p=[0.8, 0.2]),
-                    'State of the main roads - bad': np.random.choice([0, 1], p=[0.7, 0.3]),
-                    'State of the secondary roads - good': np.random.choice([0, 1], p=[0.75, 0.25]),
-                    'State of agricultural roads - good': np.random.choice([0, 1], p=[0.6, 0.4]),
-                })
-        
-        return pd.DataFrame(data)
+        df = pd.DataFrame(data)
+        df['Governorate'] = df['Governorate'].astype('category')
+        return df
+
+# One shared frame per process: st.cache_data would hand every rerun its own copy.
+# The frame is read-only; nothing below may modify it in place.
+@st.cache_resource
+def load_shared_data(csv_mtime):
+    return load_data(csv_mtime)
+
+# Derived tables are shared per process like the frame itself, and keyed on csv_mtime
+# so a rerun neither hashes the frame nor unpickles a copy. They are read-only too.
+# The frame is passed in unhashed (leading underscore) rather than loaded here, so only
+# load_shared_data records and replays the sample-data warning.
+
+# Per-region summary: mean road quality, transport counts and number of areas
+@st.cache_resource
+def build_region_agg(csv_mtime, _df):
+    # Kept in category order: the scatter legend and its colors follow the row order
+    grouped = _df.groupby('Governorate', observed=True)
+    agg_df = grouped.agg({
+        **{col: 'mean' for col in ROAD_COLS},
+        **{col: 'sum' for col in TRANSPORT_COLS}
+    })
+    agg_df['Areas'] = grouped.size()
+    return agg_df
+
+# Column subset used for row-level display, plus the row positions of each region
+@st.cache_resource
+def build_region_index(csv_mtime, _df):
+    slim = _df[['Governorate', *ROAD_COLS, *TRANSPORT_COLS]].reset_index(drop=True)
+    # One pass over the category codes instead of a comparison per region
+    region_idx = slim.groupby('Governorate', observed=True, sort=False).indices
+    return slim, region_idx
+
+# Rows of the region summary for the selected regions (all regions when none are selected)
+def select_regions(agg_df, regions):
+    if regions:
+        return agg_df[agg_df.index.isin(regions)]
+    return agg_df
+
+# Figures are keyed on the sorted region tuple so a repeated selection reuses the cached figure.
+# Like the shared frame, they are cached as resources and must not be modified after creation.
+@st.cache_resource(max_entries=32)
+def make_bar_fig(agg_df, regions, road_type):
+    # Region names come straight from the index; plain arrays take Plotly's fast encoding path
+    road_quality = select_regions(agg_df, regions)[road_type]
+    quality = road_quality.to_numpy()
+
+    fig = go.Figure(go.Bar(
+        x=road_quality.index.to_numpy(),
+        y=quality,
+        marker=dict(
+            color=quality,
+            colorscale='RdYlGn',
+            showscale=True,
+            colorbar=dict(title='Quality Score')
+        ),
+        # Labels are formatted from y, so no separate text array is shipped with the figure
+        texttemplate='%{y:.2f}',
+        textposition='outside',
+        hovertemplate='Region=%{x}<br>Quality Score=%{y}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title=f"{ROAD_LABEL[road_type]} Quality by Region",
+        xaxis_title='Region',
+        yaxis_title='Quality Score',
+        template=FIGURE_TEMPLATE,
+        height=500,
+        showlegend=False,
+        xaxis_tickangle=-45,
+        title_x=0.5,
+        uirevision='static'
+    )
+    # Plotly orders the bars by value, so the data itself is never sorted
+    fig.update_xaxes(categoryorder='total descending')
+    return fig
+
+@st.cache_resource(max_entries=32)
+def make_scatter_fig(agg_df, regions, road_type, transport_weight):
+    # Three decimals is more than the chart can show and keeps the figure JSON small
+    region_analysis = select_regions(agg_df, regions).round(3)
+    transport_column = TRANSPORT_COL[transport_weight]
+
+    # Bubble area is scaled so the largest bubble is 30px across
+    sizeref = max(region_analysis[transport_column].max(), 1) / 30 ** 2
+    columns = [road_type, TRANSPORT_COL['Taxis'], transport_column,
+               TRANSPORT_COL['Buses'], TRANSPORT_COL['Vans']]
+    # Iterate over plain arrays rather than boxing values out of each Series
+    rows = zip(
+        region_analysis.index.to_numpy(),
+        *(region_analysis[col].to_numpy() for col in columns)
+    )
+
+    # One trace per region so each gets its own legend entry and a color from the themed colorway
+    traces = [
+        go.Scatter(
+            x=[quality],
+            y=[taxis],
+            name=region,
+            mode='markers',
+            marker=dict(
+                size=[size],
+                sizemode='area',
+                sizeref=sizeref
+            ),
+            customdata=[[buses, vans]],
+            hovertemplate=(
+                f'Governorate={region}<br>Road Quality Score=%{{x}}<br>Taxi Services=%{{y}}<br>'
+                'Buses=%{customdata[0]}<br>Vans=%{customdata[1]}<extra></extra>'
+            )
+        )
+        for region, quality, taxis, size, buses, vans in rows
+    ]
+
+    fig = go.Figure(traces)
+    fig.update_layout(
+        title='Road Quality vs Transportation Usage',
+        xaxis_title='Road Quality Score',
+        yaxis_title='Taxi Services',
+        legend=dict(title='Governorate', itemsizing='constant'),
+        template=FIGURE_TEMPLATE,
+        height=500,
+        title_x=0.5,
+        uirevision='static'
+    )
+    return fig
 
 # Load data
-df = load_data()
+csv_mtime = os.path.getmtime(DATA_PATH) if os.path.exists(DATA_PATH) else None
+df = load_shared_data(csv_mtime)
+agg_df = build_region_agg(csv_mtime, df)
+slim, region_idx = build_region_index(csv_mtime, df)
 
 # Sidebar - Interactive Feature 1: Region Selection
 st.sidebar.header("Interactive Controls")
 st.sidebar.subheader("Region Selection")
 
-available_regions = df['Governorate'].unique()
+available_regions = df['Governorate'].cat.categories.to_numpy()
 selected_regions = st.sidebar.multiselect(
     "Select regions to analyze:",
     options=available_regions,
@@ -121,12 +266,8 @@ selected_regions = st.sidebar.multiselect(
 st.sidebar.subheader("Infrastructure Focus")
 road_type = st.sidebar.selectbox(
     "Analyze road quality for:",
-    options=[
-        "State of the main roads - good",
-        "State of the secondary roads - good", 
-        "State of agricultural roads - good"
-    ],
-    format_func=lambda x: x.replace("State of the ", "").replace(" - good", "").title()
+    options=ROAD_COLS,
+    format_func=ROAD_LABEL.get
 )
 
 # Interactive Feature 3: Transportation Mode Weight
@@ -137,13 +278,16 @@ transport_weight = st.sidebar.radio(
     help="This affects the size of bubbles in the scatter plot"
 )
 
-transport_column = f"The main means of public transport - {transport_weight.lower()}"
+transport_column = TRANSPORT_COL[transport_weight]
 
 # Filter data based on selections
-if selected_regions:
-    filtered_df = df[df['Governorate'].isin(selected_regions)]
-else:
-    filtered_df = df
+# Selecting every region (the default) is the same as no filter, so skip the filtering work
+all_selected = not selected_regions or len(selected_regions) == len(available_regions)
+regions_key = () if all_selected else tuple(sorted(selected_regions))
+region_agg = select_regions(agg_df, regions_key)
+if not all_selected:
+    # Row positions of the selected regions, kept in dataset order
+    idx = np.sort(np.concatenate([region_idx[g] for g in selected_regions]))
 
 # Main content area
 st.markdown("---")
@@ -152,18 +296,21 @@ st.markdown("---")
 st.subheader("Key Insights")
 col_insight1, col_insight2 = st.columns(2)
 
+if not region_agg.empty:
+    # Area and transport totals in one NumPy reduction; road quality is the area-weighted region mean
+    total_transport, total_areas = region_agg[[transport_column, 'Areas']].to_numpy().sum(axis=0)
+    avg_road_quality = region_agg[road_type].to_numpy() @ region_agg['Areas'].to_numpy() / total_areas
+
 with col_insight1:
-    if not filtered_df.empty:
-        avg_road_quality = filtered_df[road_type].mean()
+    if not region_agg.empty:
         total_regions = len(selected_regions) if selected_regions else len(available_regions)
         st.metric("Average Road Quality Score", f"{avg_road_quality:.3f}", 
                  help="Higher values indicate better road infrastructure")
         st.metric("Regions Analyzed", total_regions)
     
 with col_insight2:
-    if not filtered_df.empty:
-        total_transport = filtered_df[transport_column].sum()
-        transport_percentage = (total_transport / len(filtered_df)) * 100
+    if not region_agg.empty:
+        transport_percentage = (total_transport / total_areas) * 100
         st.metric(f"Areas with {transport_weight}", total_transport)
         st.metric(f"{transport_weight} Coverage", f"{transport_percentage:.1f}%")
 
@@ -177,41 +324,19 @@ col1, col2 = st.columns([1, 1])
 with col1:
     st.markdown("### Road Quality by Region")
     
-    if not filtered_df.empty:
-        # Calculate average road quality scores by region
-        road_quality = filtered_df.groupby("Governorate")[road_type].mean().reset_index()
-        road_quality = road_quality.sort_values(road_type, ascending=False)
-        
+    if not region_agg.empty:
         # Create bar chart
-        fig1 = px.bar(
-            road_quality,
-            x="Governorate",
-            y=road_type,
-            title=f"{road_type.replace('State of the ', '').replace(' - good', '').title()} Quality by Region",
-            labels={
-                "Governorate": "Region", 
-                road_type: "Quality Score"
-            }, 
-            text=road_type,
-            color=road_type,
-            color_continuous_scale="RdYlGn"
-        )
-        
-        fig1.update_traces(texttemplate='%{text:.2f}', textposition="outside")
-        fig1.update_layout(
-            height=500,
-            showlegend=False,
-            xaxis_tickangle=-45,
-            title_x=0.5
-        )
-        
-        st.plotly_chart(fig1, use_container_width=True)
+        fig1 = make_bar_fig(agg_df, regions_key, road_type)
+        st.plotly_chart(fig1, use_container_width=True, config=PLOTLY_CONFIG)
         
         # Show insights
-        best_region = road_quality.iloc[0]['Governorate']
-        worst_region = road_quality.iloc[-1]['Governorate']
-        best_score = road_quality.iloc[0][road_type]
-        worst_score = road_quality.iloc[-1][road_type]
+        # Positions of the extremes give both the region label and its score.
+        # Ties go to the first region for the best score and the last for the worst,
+        # as when reading both ends of the scores sorted in descending order.
+        scores = region_agg[road_type].to_numpy()
+        best, worst = scores.argmax(), len(scores) - 1 - scores[::-1].argmin()
+        best_region, worst_region = region_agg.index[best], region_agg.index[worst]
+        best_score, worst_score = scores[best], scores[worst]
         
         st.success(f"**Best Infrastructure**: {best_region} ({best_score:.3f})")
         st.error(f"**Needs Improvement**: {worst_region} ({worst_score:.3f})")
@@ -222,48 +347,26 @@ with col1:
 with col2:
     st.markdown("### Transportation vs Road Quality")
     
-    if not filtered_df.empty:
-        # Create correlation analysis
-        region_analysis = filtered_df.groupby('Governorate').agg({
-            road_type: 'mean',
-            'The main means of public transport - buses': 'sum',
-            'The main means of public transport - vans': 'sum',
-            'The main means of public transport - taxis': 'sum'
-        }).reset_index()
-        
+    if not region_agg.empty:
         # Create scatter plot
-        fig2 = px.scatter(
-            region_analysis,
-            x=road_type,
-            y='The main means of public transport - taxis',
-            size=transport_column,
-            color='Governorate',
-            title='Road Quality vs Transportation Usage',
-            labels={
-                road_type: 'Road Quality Score',
-                'The main means of public transport - taxis': 'Taxi Services',
-                transport_column: f'{transport_weight} Services'
-            },
-            hover_data=['The main means of public transport - buses', 'The main means of public transport - vans'],
-            size_max=30
-        )
+        fig2 = make_scatter_fig(agg_df, regions_key, road_type, transport_weight)
+        st.plotly_chart(fig2, use_container_width=True, config=PLOTLY_CONFIG)
         
-        fig2.update_layout(
-            height=500,
-            title_x=0.5
-        )
+        # Calculate correlation across the selected regions
+        road_scores = region_agg[road_type].to_numpy(np.float32)
+        taxi_counts = region_agg[TRANSPORT_COL['Taxis']].to_numpy(np.float32)
         
-        st.plotly_chart(fig2, use_container_width=True)
-        
-        # Calculate correlation
-        correlation = region_analysis[road_type].corr(region_analysis['The main means of public transport - taxis'])
-        
-        if correlation > 0.3:
-            st.info(f"**Positive correlation detected**: Better roads tend to have more taxi services (r = {correlation:.3f})")
-        elif correlation < -0.3:
-            st.info(f"**Negative correlation detected**: Better roads tend to have fewer taxi services (r = {correlation:.3f})")
+        if len(road_scores) < 2:
+            st.info("Select at least two regions to measure the correlation between road quality and taxi services.")
         else:
-            st.info(f"**Weak correlation**: Road quality and taxi services show little relationship (r = {correlation:.3f})")
+            correlation = float(np.corrcoef(road_scores, taxi_counts)[0, 1])
+            
+            if correlation > 0.3:
+                st.info(f"**Positive correlation detected**: Better roads tend to have more taxi services (r = {correlation:.3f})")
+            elif correlation < -0.3:
+                st.info(f"**Negative correlation detected**: Better roads tend to have fewer taxi services (r = {correlation:.3f})")
+            else:
+                st.info(f"**Weak correlation**: Road quality and taxi services show little relationship (r = {correlation:.3f})")
     
     else:
         st.warning("No data available. Please select at least one region.")
@@ -271,14 +374,16 @@ with col2:
 # Summary analysis
 st.markdown("---")
 
-# Data explorer
+# Data explorer (expander content always runs, so the preview waits for the checkbox)
 with st.expander("Raw Data Explorer"):
     st.markdown("**Filtered Dataset Preview**")
-    if not filtered_df.empty:
-        st.dataframe(
-            filtered_df[['Governorate', road_type, 'The main means of public transport - buses', 
-                        'The main means of public transport - vans', 'The main means of public transport - taxis']].head(20), 
-            use_container_width=True
-        )
-    else:
-        st.warning("No data to display. Please select at least one region.")
\ No newline at end of file
+    if st.checkbox("Show preview rows", key="show_preview"):
+        if not region_agg.empty:
+            # Only the 20 preview rows are gathered from the slim frame
+            preview = slim.head(20) if all_selected else slim.iloc[idx[:20]]
+            st.dataframe(
+                preview[['Governorate', road_type, *TRANSPORT_COLS]], 
+                use_container_width=True
+            )
+        else:
+            st.warning("No data to display. Please select at least one region.")
\ No newline at end of file